@@ -1,17 +1,22 @@
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+
+MAX_BATCH_SIZE = 32
 
 
 class ContentCreate(BaseModel):
     text: str
 
 
+class ContentBatchCreate(BaseModel):
+    items: List[ContentCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
 class ContentOut(BaseModel):
     id: int
     text: str
     summary: Optional[str] = None
     sentiment: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -33,3 +33,8 @@ class Content(Base):
     )
 
     owner = relationship("User", back_populates="contents")
+
+    # Serves list_contents: WHERE user_id = ? ORDER BY created_at DESC
+    __table_args__ = (
+        Index("ix_contents_user_created", user_id, created_at.desc()),
+    )
@@ -1,29 +1,51 @@
-import json
+import asyncio
 import logging
-from typing import List, Tuple
+import re
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
 
 
+import orjson
 from fastapi import (
+    BackgroundTasks,
     Depends,
     FastAPI,
     HTTPException,
     Response,
     status,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, load_only, raiseload
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
-from .config import OPENAI_API_KEY
-from .data_models.content_model import ContentCreate, ContentOut
+from .config import (
+    FRONTEND_ORIGINS,
+    LLM_BATCH_MAX_CHARS,
+    LLM_MAX_ATTEMPTS,
+    LLM_MAX_CONCURRENCY,
+    LLM_MIN_CHARS,
+    OPENAI_API_KEY,
+)
+from .data_models.content_model import ContentBatchCreate, ContentCreate, ContentOut
 from .data_models.user_model import Token, UserCreate, UserOut
 from .db import models as db_models
 from .db.database import Base, engine, get_db
+from .utils import llm_cache
 from .utils.auth import (
     create_access_token,
     get_current_user,
     get_password_hash,
-    verify_password,
+    validate_token,
+    verify_and_update_password,
 )
 
 #DB setup
@@ -31,27 +53,192 @@ Base.metadata.create_all(bind=engine)
 
 #LLM client (OpenAI) 
 try:
-    from openai import AsyncOpenAI
+    import httpx
+    from openai import APIConnectionError, AsyncOpenAI, RateLimitError
 
-    openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-except Exception:  # pragma: no cover
-    openai_client = None
+    RETRYABLE_LLM_ERRORS = (RateLimitError, APIConnectionError)
+except ImportError:  # pragma: no cover
+    AsyncOpenAI = None
+    RETRYABLE_LLM_ERRORS = ()
+
+# Built in lifespan startup and closed on shutdown (see open_openai_client)
+http_client = None
+openai_client = None
+
+# Caps in-flight OpenAI requests so bursts don't trip provider rate limits
+_LLM_SEM = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)    
 
+
+def open_openai_client() -> None:
+    """
+    Builds the shared HTTP pool and the OpenAI client on top of it.
+
+    Construction errors (e.g. http2=True without the h2 package) are not
+    caught, so a broken install fails at startup instead of silently
+    switching every request to the fallback heuristic.
+    """
+    global http_client, openai_client
+    if not OPENAI_API_KEY:
+        return
+    if AsyncOpenAI is None:
+        logger.error("OPENAI_API_KEY is set but the openai package is not installed.")
+        return
+
+    # Shared connection pool for OpenAI: HTTP/2 multiplexing, explicit timeouts
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(connect=5, read=30, write=10, pool=5),
+    )
+    # max_retries=0: retries are done by create_completion's backoff below
+    openai_client = AsyncOpenAI(
+        api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0
+    )
+
+
+async def close_openai_client() -> None:
+    global http_client, openai_client
+    if http_client is not None:
+        await http_client.aclose()
+    http_client = None
+    openai_client = None
+
+
 #FastAPI app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: fresh pooled clients for every lifespan cycle
+    open_openai_client()
+    llm_cache.open_redis_client()
+    yield
+    # Shutdown: release pooled connections
+    await close_openai_client()
+    await llm_cache.close_redis_client()
+
+
 app = FastAPI(
     title="The Intelligent Content API",
     description="Simple backend with signup/login and content analysis endpoints (Summary & Sentiment Analysis).",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"], 
+    allow_origins=FRONTEND_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=600,  # let browsers cache preflight responses for 10 minutes
+)
+
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+_POSITIVE_WORDS = frozenset({"good", "great", "excellent", "love", "happy"})
+_NEGATIVE_WORDS = frozenset({"bad", "terrible", "awful", "hate", "sad"})
+_WORD_RE = re.compile(r"[a-z]+")
+
+# System prompts are built once and must stay byte-identical across calls
+# (no f-strings/timestamps) so OpenAI's prompt-prefix caching can kick in
+_SYSTEM_MSG = {
+    "role": "system",
+    "content": "Summarize the text briefly and classify its sentiment.",
+}
+_BATCH_SYSTEM_MSG = {
+    "role": "system",
+    "content": (
+        "You are given a JSON array of texts. For each text, in order, "
+        "summarize it briefly and classify its sentiment."
+    ),
+}
+
+# Structured output: the model can only return these two fields
+_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "sentiment": {
+            "type": "string",
+            "enum": ["Positive", "Negative", "Neutral"],
+        },
+    },
+    "required": ["summary", "sentiment"],
+    "additionalProperties": False,
+}
+
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "content_analysis",
+        "strict": True,
+        "schema": _ANALYSIS_SCHEMA,
+    },
+}
+
+# Batch variant: one analysis object per input text, in input order
+BATCH_ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "content_analysis_batch",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {"type": "array", "items": _ANALYSIS_SCHEMA},
+            },
+            "required": ["results"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+#Helper: keyword heuristic used when the LLM is unavailable
+def simple_fallback(text: str) -> Tuple[str, str]:
+    sentiment = "Neutral"
+    # Whole words only ("goodbye" is not "good"); any positive word wins
+    for word in _WORD_RE.findall(text.lower()):
+        if word in _POSITIVE_WORDS:
+            sentiment = "Positive"
+            break
+        if word in _NEGATIVE_WORDS:
+            sentiment = "Negative"
+    summary = text if len(text) <= 200 else text[:200] + "..."
+    return summary, sentiment
+
+
+#Helper: chat completion with a concurrency cap and exponential backoff
+@retry(
+    stop=stop_after_attempt(LLM_MAX_ATTEMPTS),
+    wait=wait_random_exponential(min=1, max=20),
+    retry=retry_if_exception_type(RETRYABLE_LLM_ERRORS),
+    reraise=True,
 )
+async def create_completion(**kwargs):
+    # Hold a permit only for the request itself, not while backing off
+    async with _LLM_SEM:
+        return await openai_client.chat.completions.create(**kwargs)
+
+
+#Helper: embed texts for the semantic cache (one request for all of them)
+async def embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
+    try:
+        async with _LLM_SEM:
+            response = await openai_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts,
+            )
+    except Exception as exc:
+        logger.warning("Embedding call failed, skipping semantic cache: %s", exc)
+        return None
+    return [item.embedding for item in response.data]
+
+
+async def embed_text(text: str) -> Optional[List[float]]:
+    embeddings = await embed_texts([text])
+    return embeddings[0] if embeddings is not None else None
 
 
 #Helper: analyze text with LLM (or fallback)
@@ -59,51 +246,169 @@ async def analyze_text_with_llm(text: str) -> Tuple[str, str]:
     """
     Returns (summary, sentiment).
 
+    Results are cached: first by exact text (Redis, if REDIS_URL is set),
+    then by embedding similarity to recently analyzed texts.
+
+    Texts shorter than LLM_MIN_CHARS are too short to summarize and go
+    straight to the heuristic.
+
     If OPENAI_API_KEY is not set or client is unavailable, or if the
-    AI call fails, falls back to a simple heuristic so the API remains usable.
+    AI call still fails after retries, falls back to a simple heuristic
+    so the API remains usable.
     """
 
-    def simple_fallback(t: str) -> Tuple[str, str]:
-        lowered = t.lower()
-        sentiment = "Neutral"
-        if any(w in lowered for w in ["good", "great", "excellent", "love", "happy"]):
-            sentiment = "Positive"
-        elif any(w in lowered for w in ["bad", "terrible", "awful", "hate", "sad"]):
-            sentiment = "Negative"
-        summary = t if len(t) <= 200 else t[:200] + "..."
-        return summary, sentiment
+    # Normalized once for the length check, cache keys and prompt; the
+    # fallback summary keeps the caller's original text
+    normalized = " ".join(text.split())
+    if len(normalized) < LLM_MIN_CHARS:
+        return simple_fallback(text)
 
     # No key / client not available → use fallback directly
     if not OPENAI_API_KEY or openai_client is None:
         logger.info("OPENAI_API_KEY not set or client unavailable; using fallback analysis.")
         return simple_fallback(text)
 
+    # Exact-match cache hit → skip the network entirely
+    cached = await llm_cache.get_exact(normalized)
+    if cached is not None:
+        return cached
+
+    # Semantic cache: near-duplicate texts reuse a previous analysis
+    embedding = None
+    if llm_cache.semantic_cache.enabled:
+        embedding = await embed_text(normalized)
+        if embedding is not None:
+            cached = llm_cache.semantic_cache.lookup(embedding)
+            if cached is not None:
+                await llm_cache.set_exact(normalized, cached)
+                return cached
+
     try:
-        completion = await openai_client.chat.completions.create(
+        completion = await create_completion(
             model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You summarize text and return JSON with keys "
-                        '"summary" and "sentiment". '
-                        'Sentiment must be exactly one of "Positive", "Negative", or "Neutral".'
-                    ),
-                },
-                {"role": "user", "content": text},
-            ],
-            response_format={"type": "json_object"},
+            messages=[_SYSTEM_MSG, {"role": "user", "content": normalized}],
+            response_format=ANALYSIS_RESPONSE_FORMAT,
         )
 
         content = completion.choices[0].message.content
-        data = json.loads(content)
-        return data["summary"], data["sentiment"]
+        data = orjson.loads(content)
+        result = data["summary"], data["sentiment"]
 
     except Exception as exc:
         # If OpenAI fails for any reason, do NOT crash the API
         logger.error("LLM call failed, falling back to simple heuristic: %s", exc)
         return simple_fallback(text)
 
+    await llm_cache.set_exact(normalized, result)
+    if embedding is not None:
+        llm_cache.semantic_cache.add(embedding, result)
+    return result
+
+
+
+#Helper: one completion for a group of texts (raises on any failure)
+async def complete_batch(texts: List[str]) -> List[Tuple[str, str]]:
+    completion = await create_completion(
+        model="gpt-4o-mini",
+        messages=[
+            _BATCH_SYSTEM_MSG,
+            {"role": "user", "content": orjson.dumps(texts).decode()},
+        ],
+        response_format=BATCH_ANALYSIS_RESPONSE_FORMAT,
+    )
+
+    content = completion.choices[0].message.content
+    data = orjson.loads(content)["results"]
+    if len(data) != len(texts):
+        raise ValueError(f"expected {len(texts)} results, got {len(data)}")
+    return [(item["summary"], item["sentiment"]) for item in data]
+
+
+#Helper: group text indices so each group stays under max_chars of input
+def chunk_by_length(
+    indices: List[int], texts: List[str], max_chars: int
+) -> List[List[int]]:
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    size = 0
+    for i in indices:
+        if current and size + len(texts[i]) > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += len(texts[i])
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+#Helper: analyze many texts with as few LLM calls as possible (or fallback)
+async def analyze_texts_with_llm(texts: List[str]) -> List[Tuple[str, str]]:
+    """
+    Returns one (summary, sentiment) per text, in input order.
+
+    Texts already in the exact or semantic cache reuse their analysis. The
+    rest go to the LLM in as few completions as possible, each holding at
+    most LLM_BATCH_MAX_CHARS of input so long batches don't get truncated.
+    Short texts, and every text in a completion that fails or returns the
+    wrong number of results, get the simple heuristic instead.
+    """
+    # Normalized for length checks, cache keys and prompts; fallback
+    # summaries keep the original texts
+    normalized = [" ".join(text.split()) for text in texts]
+    results = [simple_fallback(text) for text in texts]
+
+    pending = [i for i, text in enumerate(normalized) if len(text) >= LLM_MIN_CHARS]
+    if not pending:
+        return results
+    if not OPENAI_API_KEY or openai_client is None:
+        logger.info("OPENAI_API_KEY not set or client unavailable; using fallback analysis.")
+        return results
+
+    # Exact-match cache
+    hits = await asyncio.gather(*(llm_cache.get_exact(normalized[i]) for i in pending))
+    misses = []
+    for i, hit in zip(pending, hits):
+        if hit is not None:
+            results[i] = hit
+        else:
+            misses.append(i)
+
+    # Semantic cache, with one embeddings request for all remaining texts
+    embeddings = {}
+    if misses and llm_cache.semantic_cache.enabled:
+        vectors = await embed_texts([normalized[i] for i in misses])
+        if vectors is not None:
+            remaining = []
+            for i, vector in zip(misses, vectors):
+                hit = llm_cache.semantic_cache.lookup(vector)
+                if hit is not None:
+                    results[i] = hit
+                    await llm_cache.set_exact(normalized[i], hit)
+                else:
+                    embeddings[i] = vector
+                    remaining.append(i)
+            misses = remaining
+
+    if not misses:
+        return results
+
+    chunks = chunk_by_length(misses, normalized, LLM_BATCH_MAX_CHARS)
+    outcomes = await asyncio.gather(
+        *(complete_batch([normalized[i] for i in chunk]) for chunk in chunks),
+        return_exceptions=True,
+    )
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, BaseException):
+            # If OpenAI fails for any reason, do NOT crash the API
+            logger.error("Batch LLM call failed, falling back to simple heuristic: %s", outcome)
+            continue
+        for i, result in zip(chunk, outcome):
+            results[i] = result
+            await llm_cache.set_exact(normalized[i], result)
+            if i in embeddings:
+                llm_cache.semantic_cache.add(embeddings[i], result)
+    return results
 
 
 #Health check
@@ -114,12 +419,12 @@ async def health_check():
 
 #Auth endpoints
 @app.post("/signup", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-async def signup(
+def signup(
     user_in: UserCreate,
     db: Session = Depends(get_db),
 ):
     existing = (
-        db.query(db_models.User).filter(db_models.User.email == user_in.email).first()
+        db.query(db_models.User.id).filter(db_models.User.email == user_in.email).first()
     )
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered.")
@@ -133,58 +438,170 @@ async def signup(
 
 
 @app.post("/login", response_model=Token)
-async def login(
+def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
     # Treat "username" field from form as email
     user = (
         db.query(db_models.User)
+        .options(
+            load_only(
+                db_models.User.id,
+                db_models.User.email,
+                db_models.User.hashed_password,
+            )
+        )
         .filter(db_models.User.email == form_data.username)
         .first()
     )
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = verify_and_update_password(
+            form_data.password, user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password.",
         )
 
-    access_token = create_access_token(subject=user.email)
+    access_token = create_access_token(subject=user.email, user_id=user.id)
+
+    if new_hash is not None:
+        # Upgrade legacy pbkdf2 (or outdated argon2) hashes on successful login
+        user.hashed_password = new_hash
+        db.commit()
+
     return Token(access_token=access_token)
 
 
+#Helper: write analysis results onto existing rows (sync)
+def save_analyses(bind: Engine, rows: List[Tuple[int, str, str]]) -> None:
+    """Takes (content_id, summary, sentiment) rows; one executemany UPDATE, one commit."""
+    contents = db_models.Content.__table__
+    with Session(bind=bind) as db:
+        db.execute(
+            update(contents)
+            .where(contents.c.id == bindparam("b_id"))
+            .values(summary=bindparam("b_summary"), sentiment=bindparam("b_sentiment")),
+            [
+                {"b_id": content_id, "b_summary": summary, "b_sentiment": sentiment}
+                for content_id, summary, sentiment in rows
+            ],
+        )
+        db.commit()
+
+
+#Background tasks: analyze stored contents and fill in summary/sentiment
+#(the request's session is gone by then, so they open a fresh one on the same engine)
+async def analyze_and_update_content(content_id: int, text: str, bind: Engine) -> None:
+    try:
+        summary, sentiment = await analyze_text_with_llm(text)
+        await run_in_threadpool(save_analyses, bind, [(content_id, summary, sentiment)])
+    except Exception as exc:
+        # Clients poll until summary/sentiment are set; never leave them NULL
+        logger.error("Analysis of content %s failed, storing fallback: %s", content_id, exc)
+        summary, sentiment = simple_fallback(text)
+        await run_in_threadpool(save_analyses, bind, [(content_id, summary, sentiment)])
+
+
+async def analyze_and_update_contents(
+    content_ids: List[int], texts: List[str], bind: Engine
+) -> None:
+    try:
+        results = await analyze_texts_with_llm(texts)
+        rows = [
+            (content_id, summary, sentiment)
+            for content_id, (summary, sentiment) in zip(content_ids, results)
+        ]
+        await run_in_threadpool(save_analyses, bind, rows)
+    except Exception as exc:
+        # Clients poll until summary/sentiment are set; never leave them NULL
+        logger.error(
+            "Batch analysis of contents %s failed, storing fallback: %s", content_ids, exc
+        )
+        rows = [
+            (content_id, *simple_fallback(text))
+            for content_id, text in zip(content_ids, texts)
+        ]
+        await run_in_threadpool(save_analyses, bind, rows)
+
+
 #Content endpoints
-@app.post("/contents", response_model=ContentOut, status_code=status.HTTP_201_CREATED)
-async def create_content(
+#Endpoints that only talk to the DB are plain `def` so FastAPI runs them in
+#its threadpool; blocking SQLAlchemy calls must not run on the event loop.
+@app.post("/contents", response_model=ContentOut, status_code=status.HTTP_202_ACCEPTED)
+def create_content(
     payload: ContentCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user),
 ):
-    # 1) Store original text
-    content = db_models.Content(text=payload.text, owner=current_user)
+    """
+    Stores the text and returns right away with summary/sentiment unset.
+
+    Analysis runs after the response is sent; poll GET /contents/{id}
+    until summary and sentiment are filled in.
+    """
+    content = db_models.Content(text=payload.text, user_id=current_user.id)
     db.add(content)
     db.commit()
     db.refresh(content)
 
-    # 2) Analyze with LLM (or fallback)
-    summary, sentiment = await analyze_text_with_llm(payload.text)
-    content.summary = summary
-    content.sentiment = sentiment
+    background_tasks.add_task(
+        analyze_and_update_content, content.id, payload.text, db.get_bind()
+    )
+    return content
+
+
+@app.post(
+    "/contents/batch",
+    response_model=List[ContentOut],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_contents_batch(
+    payload: ContentBatchCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    """
+    Stores up to MAX_BATCH_SIZE texts in one transaction and returns them in
+    input order with summary/sentiment unset.
+
+    All texts are then analyzed together (see analyze_texts_with_llm);
+    poll GET /contents/{id} for the results.
+    """
+    texts = [item.text for item in payload.items]
+    content_ids = db.execute(
+        insert(db_models.Content).returning(
+            db_models.Content.id, sort_by_parameter_order=True
+        ),
+        [{"text": text, "user_id": current_user.id} for text in texts],
+    ).scalars().all()
     db.commit()
-    db.refresh(content)
 
-    return content
+    background_tasks.add_task(
+        analyze_and_update_contents, content_ids, texts, db.get_bind()
+    )
+    return [
+        ContentOut(id=content_id, text=text)
+        for content_id, text in zip(content_ids, texts)
+    ]
 
 
 @app.get("/contents", response_model=List[ContentOut])
-async def list_contents(
+def list_contents(
     db: Session = Depends(get_db),
-    current_user: db_models.User = Depends(get_current_user),
+    user_id: int = Depends(validate_token),
 ):
+    # ContentOut has no relationships; make any lazy load (N+1) fail loudly
     contents = (
         db.query(db_models.Content)
-        .filter(db_models.Content.user_id == current_user.id)
+        .options(raiseload("*"))
+        .filter(db_models.Content.user_id == user_id)
         .order_by(db_models.Content.created_at.desc())
         .all()
     )
@@ -192,41 +609,45 @@ async def list_contents(
 
 
 @app.get("/contents/{content_id}", response_model=ContentOut)
-async def get_content(
+def get_content(
     content_id: int,
     db: Session = Depends(get_db),
-    current_user: db_models.User = Depends(get_current_user),
+    user_id: int = Depends(validate_token),
 ):
-    content = (
-        db.query(db_models.Content)
-        .filter(
-            db_models.Content.id == content_id,
-            db_models.Content.user_id == current_user.id,
-        )
-        .first()
+    # Primary-key lookup (identity map first), loading only what ContentOut needs
+    content = db.get(
+        db_models.Content,
+        content_id,
+        options=[
+            load_only(
+                db_models.Content.id,
+                db_models.Content.user_id,
+                db_models.Content.text,
+                db_models.Content.summary,
+                db_models.Content.sentiment,
+            )
+        ],
     )
-    if not content:
+    if not content or content.user_id != user_id:
         raise HTTPException(status_code=404, detail="Content not found.")
     return content
 
 
 @app.delete("/contents/{content_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_content(
+def delete_content(
     content_id: int,
     db: Session = Depends(get_db),
-    current_user: db_models.User = Depends(get_current_user),
+    user_id: int = Depends(validate_token),
 ):
-    content = (
-        db.query(db_models.Content)
-        .filter(
+    # Single DELETE ... WHERE; no need to load the row first
+    result = db.execute(
+        delete(db_models.Content).where(
             db_models.Content.id == content_id,
-            db_models.Content.user_id == current_user.id,
+            db_models.Content.user_id == user_id,
         )
-        .first()
     )
-    if not content:
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Content not found.")
 
-    db.delete(content)
     db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,23 +1,56 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import threading
+import time
+from datetime import timedelta
+from typing import NamedTuple, Optional, Tuple
 
+import jwt
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jwt import PyJWTError
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from ..config import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    ARGON2_TIME_COST,
     JWT_ALGORITHM,
     JWT_SECRET_KEY,
+    TOKEN_CACHE_MAX_SIZE,
+    TOKEN_CACHE_TTL_SECONDS,
 )
 from ..db import models
 from ..db.database import get_db
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2", "pbkdf2_sha256"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Encoded once at import instead of on every sign/verify
+_SECRET_BYTES = JWT_SECRET_KEY.encode() if JWT_SECRET_KEY else None
+_DEFAULT_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+class CachedToken(NamedTuple):
+    user_id: int
+    exp: int
+
+
+# Raw token -> owner, so repeat requests skip the JWT verify and email lookup
+_TOKEN_CACHE: "TTLCache[str, CachedToken]" = TTLCache(
+    maxsize=TOKEN_CACHE_MAX_SIZE,
+    ttl=TOKEN_CACHE_TTL_SECONDS,
+)
+# get_current_user runs in the threadpool and TTLCache is not thread-safe
+_TOKEN_CACHE_LOCK = threading.Lock()
+
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -27,36 +60,103 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Returns (verified, new_hash).
+
+    new_hash is set when the stored hash uses a deprecated scheme (pbkdf2)
+    or outdated argon2 parameters and should be replaced.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def create_access_token(
+    subject: str,
+    expires_delta: Optional[timedelta] = None,
+    *,
+    user_id: Optional[int] = None,
+) -> str:
     if expires_delta is None:
-        expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire_seconds = _DEFAULT_EXPIRE_SECONDS
+    else:
+        expire_seconds = int(expires_delta.total_seconds())
 
-    to_encode = {"sub": subject, "exp": datetime.utcnow() + expires_delta}
-    return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    # JWT "exp" is a NumericDate (seconds since the epoch)
+    to_encode = {"sub": subject, "exp": int(time.time()) + expire_seconds}
+    if user_id is not None:
+        # Lets validate_token authorize requests without touching the users table
+        to_encode["uid"] = user_id
+    return jwt.encode(to_encode, _SECRET_BYTES, algorithm=JWT_ALGORITHM)
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> models.User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials.",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _resolve_token(token: str, db: Session) -> CachedToken:
+    """Validates the JWT (or finds it in the token cache) and returns its owner."""
+    with _TOKEN_CACHE_LOCK:
+        cached = _TOKEN_CACHE.get(token)
+    if cached is not None and cached.exp > time.time():
+        return cached
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE.pop(token, None)
+
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, _SECRET_BYTES, algorithms=[JWT_ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+            raise _credentials_exception()
+    except PyJWTError:
+        raise _credentials_exception()
+
+    user_id = payload.get("uid")
+    if user_id is None:
+        # Token minted without a uid claim: look the owner up by email
+        user = get_user_by_email(db, email=email)
+        if user is None:
+            raise _credentials_exception()
+        user_id = user.id
+
+    exp = payload.get("exp")
+    resolved = CachedToken(user_id=user_id, exp=exp if exp is not None else 0)
+    if exp is not None:
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[token] = resolved
+    return resolved
 
-    user = get_user_by_email(db, email=email)
+
+def validate_token(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> int:
+    """
+    Returns the authenticated user's id without loading the user row.
+
+    Use it for endpoints that only need to scope queries by owner.
+    """
+    return _resolve_token(token, db).user_id
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> models.User:
+    resolved = _resolve_token(token, db)
+    # Primary-key lookup; served from the identity map when possible
+    user = db.get(models.User, resolved.user_id)
     if user is None:
-        raise credentials_exception
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE.pop(token, None)
+        raise _credentials_exception()
     return user
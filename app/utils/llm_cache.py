@@ -0,0 +1,137 @@
+import hashlib
+import logging
+from typing import List, Optional, Tuple
+
+import orjson
+
+from ..config import (
+    LLM_CACHE_TTL_SECONDS,
+    LLM_SEMANTIC_CACHE_SIZE,
+    LLM_SEMANTIC_THRESHOLD,
+    REDIS_URL,
+)
+
+#Exact-match tier (Redis)
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover
+    aioredis = None
+
+# Opened in the app's lifespan startup (see open_redis_client)
+redis_client = None
+
+#Semantic tier (in-process inner-product index)
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EXACT_KEY_PREFIX = "llm:exact:"
+
+
+def open_redis_client() -> None:
+    global redis_client
+    if not REDIS_URL:
+        return
+    if aioredis is None:
+        logger.error("REDIS_URL is set but the redis package is not installed.")
+        return
+    redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+
+
+async def close_redis_client() -> None:
+    global redis_client
+    if redis_client is not None:
+        await redis_client.aclose()
+    redis_client = None
+
+
+def _exact_key(text: str) -> str:
+    return EXACT_KEY_PREFIX + hashlib.sha256(text.encode()).hexdigest()
+
+
+async def get_exact(text: str) -> Optional[Tuple[str, str]]:
+    """Returns the cached (summary, sentiment) for this exact text, if any."""
+    if redis_client is None:
+        return None
+    try:
+        raw = await redis_client.get(_exact_key(text))
+        if raw is None:
+            return None
+        data = orjson.loads(raw)
+        return data["summary"], data["sentiment"]
+    except Exception as exc:
+        logger.warning("Exact cache lookup failed, skipping it: %s", exc)
+        return None
+
+
+async def set_exact(text: str, result: Tuple[str, str]) -> None:
+    if redis_client is None:
+        return
+    summary, sentiment = result
+    payload = orjson.dumps({"summary": summary, "sentiment": sentiment})
+    try:
+        await redis_client.setex(_exact_key(text), LLM_CACHE_TTL_SECONDS, payload)
+    except Exception as exc:
+        logger.warning("Redis write failed, result not cached: %s", exc)
+
+
+class SemanticCache:
+    """
+    Fixed-size ring buffer of normalized embeddings and their analysis results.
+
+    Lookups are a brute-force inner product over the buffer (the same thing a
+    FAISS IndexFlatIP does), which is plenty fast for a few thousand entries.
+    """
+
+    def __init__(self, max_entries: int, threshold: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._vectors = None
+        self._results: List[Optional[Tuple[str, str]]] = [None] * max_entries
+        self._count = 0
+        self._next = 0
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None and self.max_entries > 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: List[float]) -> Optional[Tuple[str, str]]:
+        if not self.enabled or self._count == 0:
+            return None
+        vector = self._normalize(embedding)
+        if vector.shape[0] != self._vectors.shape[1]:
+            return None
+        scores = self._vectors[: self._count] @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self._results[best]
+        return None
+
+    def add(self, embedding: List[float], result: Tuple[str, str]) -> None:
+        if not self.enabled:
+            return
+        vector = self._normalize(embedding)
+        if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+            # First entry (or embedding model changed): (re)allocate the buffer
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self._count = 0
+            self._next = 0
+        self._vectors[self._next] = vector
+        self._results[self._next] = result
+        self._next = (self._next + 1) % self.max_entries
+        self._count = min(self._count + 1, self.max_entries)
+
+
+semantic_cache = SemanticCache(
+    max_entries=LLM_SEMANTIC_CACHE_SIZE,
+    threshold=LLM_SEMANTIC_THRESHOLD,
+)
@@ -1,6 +1,11 @@
 import os
 from typing import Generator
 
+# Cheapest valid argon2 parameters so password hashing doesn't dominate the suite
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "8")
+os.environ.setdefault("ARGON2_PARALLELISM", "1")
+
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -31,3 +36,27 @@ app.dependency_overrides[get_db] = override_get_db
 
 def get_client() -> TestClient:
     return TestClient(app)
+
+
+def auth_headers(client: TestClient, email: str, password: str = "strongpassword") -> dict:
+    """Signs up a new user, logs in, and returns the bearer Authorization header."""
+    r = client.post("/signup", json={"email": email, "password": password})
+    assert r.status_code == 201
+    r = client.post("/login", data={"username": email, "password": password})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio client used by llm_cache."""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+        self.ttls[key] = ttl
@@ -1,6 +1,10 @@
 from fastapi import status
+from passlib.hash import pbkdf2_sha256
 
-from .conftest import get_client
+from app import main
+from app.db import models as db_models
+
+from .conftest import TestingSessionLocal, auth_headers, get_client
 
 
 def test_signup_and_login_and_create_content():
@@ -35,9 +39,14 @@ def test_signup_and_login_and_create_content():
         "text": "This is a good day. I am very happy with the results."
     }
     r = client.post("/contents", json=content_payload, headers=headers)
-    assert r.status_code == status.HTTP_201_CREATED
+    assert r.status_code == status.HTTP_202_ACCEPTED
     content = r.json()
     assert content["text"] == content_payload["text"]
+
+    # Analysis runs as a background task; poll the content for its result
+    r = client.get(f"/contents/{content['id']}", headers=headers)
+    assert r.status_code == status.HTTP_200_OK
+    content = r.json()
     assert content["summary"] is not None
     assert content["sentiment"] in ["Positive", "Negative", "Neutral"]
 
@@ -47,3 +56,94 @@ def test_signup_and_login_and_create_content():
     items = r.json()
     assert len(items) >= 1
     assert any(item["id"] == content["id"] for item in items)
+
+
+def test_create_contents_batch():
+    client = get_client()
+
+    headers = auth_headers(client, "batchuser@example.com")
+
+    texts = [
+        "What a terrible week, everything went wrong and I hate it.",
+        "ok",
+        "The team shipped the release on time and everyone is happy.",
+    ]
+    r = client.post(
+        "/contents/batch",
+        json={"items": [{"text": text} for text in texts]},
+        headers=headers,
+    )
+    assert r.status_code == status.HTTP_202_ACCEPTED
+    items = r.json()
+    assert [item["text"] for item in items] == texts
+
+    # Analysis runs as a background task; every item gets its own result
+    for item in items:
+        r = client.get(f"/contents/{item['id']}", headers=headers)
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()["summary"] is not None
+        assert r.json()["sentiment"] in ["Positive", "Negative", "Neutral"]
+
+    r = client.post("/contents/batch", json={"items": []}, headers=headers)
+    assert r.status_code == 422
+
+
+def test_login_upgrades_legacy_pbkdf2_hash():
+    client = get_client()
+
+    email, password = "legacyuser@example.com", "strongpassword"
+    with TestingSessionLocal() as db:
+        db.add(db_models.User(email=email, hashed_password=pbkdf2_sha256.hash(password)))
+        db.commit()
+
+    r = client.post("/login", data={"username": email, "password": password})
+    assert r.status_code == status.HTTP_200_OK
+
+    with TestingSessionLocal() as db:
+        user = db.query(db_models.User).filter(db_models.User.email == email).one()
+        assert user.hashed_password.startswith("$argon2")
+
+    # The upgraded hash still verifies
+    r = client.post("/login", data={"username": email, "password": password})
+    assert r.status_code == status.HTTP_200_OK
+
+
+def test_failed_analysis_stores_fallback(monkeypatch):
+    client = get_client()
+
+    headers = auth_headers(client, "failinguser@example.com")
+
+    async def broken_analysis(text):
+        raise RuntimeError("analysis exploded")
+
+    monkeypatch.setattr(main, "analyze_text_with_llm", broken_analysis)
+
+    text = "This is a good day. I am very happy with the results."
+    r = client.post("/contents", json={"text": text}, headers=headers)
+    assert r.status_code == status.HTTP_202_ACCEPTED
+
+    # The row still reaches a final state, using the heuristic result
+    r = client.get(f"/contents/{r.json()['id']}", headers=headers)
+    assert r.json()["summary"] == text
+    assert r.json()["sentiment"] == "Positive"
+
+
+def test_other_users_content_is_not_found():
+    client = get_client()
+
+    owner = auth_headers(client, "owner@example.com")
+    intruder = auth_headers(client, "intruder@example.com")
+
+    r = client.post("/contents", json={"text": "Private notes."}, headers=owner)
+    content_id = r.json()["id"]
+
+    r = client.get(f"/contents/{content_id}", headers=intruder)
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+    r = client.delete(f"/contents/{content_id}", headers=intruder)
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+    r = client.get("/contents", headers=intruder)
+    assert all(item["id"] != content_id for item in r.json())
+
+    # Still there for its owner
+    r = client.get(f"/contents/{content_id}", headers=owner)
+    assert r.status_code == status.HTTP_200_OK
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app import main
+from app.main import chunk_by_length, simple_fallback
+from app.utils import llm_cache
+
+from .conftest import FakeRedis
+
+CACHED_TEXT = "This text was already analyzed by an earlier request."
+NEW_TEXT = "This text has never been seen before by the analyzer."
+FAILING_TEXT = "This text belongs to a completion that will fail badly."
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Pretends the LLM is configured and records every batch completion."""
+    sent = []
+
+    async def complete_batch(texts):
+        sent.append(texts)
+        if FAILING_TEXT in texts:
+            raise RuntimeError("completion truncated")
+        return [("LLM summary", "Positive") for _ in texts]
+
+    monkeypatch.setattr(main, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(main, "openai_client", object())
+    monkeypatch.setattr(main, "complete_batch", complete_batch)
+    monkeypatch.setattr(llm_cache, "redis_client", FakeRedis())
+    monkeypatch.setattr(llm_cache.semantic_cache, "max_entries", 0)
+    return sent
+
+
+def test_chunk_by_length_splits_oversized_batches():
+    texts = ["a" * 10, "b" * 10, "c" * 25, "d" * 5]
+    assert chunk_by_length([0, 1, 2, 3], texts, 20) == [[0, 1], [2], [3]]
+
+
+def test_batch_reuses_and_warms_exact_cache(fake_llm):
+    asyncio.run(llm_cache.set_exact(CACHED_TEXT, ("Cached summary", "Neutral")))
+
+    results = asyncio.run(main.analyze_texts_with_llm([CACHED_TEXT, NEW_TEXT, "ok"]))
+
+    assert fake_llm == [[NEW_TEXT]]
+    assert results == [
+        ("Cached summary", "Neutral"),
+        ("LLM summary", "Positive"),
+        simple_fallback("ok"),
+    ]
+    assert asyncio.run(llm_cache.get_exact(NEW_TEXT)) == ("LLM summary", "Positive")
+
+
+def test_failed_chunk_only_falls_back_for_its_own_texts(fake_llm, monkeypatch):
+    monkeypatch.setattr(main, "LLM_BATCH_MAX_CHARS", len(NEW_TEXT))
+
+    results = asyncio.run(main.analyze_texts_with_llm([NEW_TEXT, FAILING_TEXT]))
+
+    assert fake_llm == [[NEW_TEXT], [FAILING_TEXT]]
+    assert results == [("LLM summary", "Positive"), simple_fallback(FAILING_TEXT)]
+    assert asyncio.run(llm_cache.get_exact(FAILING_TEXT)) is None
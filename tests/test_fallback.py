@@ -0,0 +1,31 @@
+import asyncio
+
+from app import main
+from app.main import simple_fallback
+
+SPACED_TEXT = "Line one is good.\n\nLine two  has   spacing"
+
+
+def test_simple_fallback_sentiment_matches_whole_words():
+    assert simple_fallback("This is a good day.")[1] == "Positive"
+    assert simple_fallback("Sad news, but I love it.")[1] == "Positive"
+    assert simple_fallback("What a terrible, sad week.")[1] == "Negative"
+    # Substrings of keywords must not count
+    assert simple_fallback("Goodbye, Saddam said sadly.")[1] == "Neutral"
+
+
+def test_simple_fallback_truncates_long_summary():
+    text = "word " * 100
+    summary, _ = simple_fallback(text)
+    assert summary == text[:200] + "..."
+    assert simple_fallback("short")[0] == "short"
+
+
+def test_fallback_summary_keeps_original_whitespace(monkeypatch):
+    monkeypatch.setattr(main, "openai_client", None)
+
+    assert asyncio.run(main.analyze_text_with_llm(SPACED_TEXT)) == (SPACED_TEXT, "Positive")
+    assert asyncio.run(main.analyze_texts_with_llm([SPACED_TEXT, "ok"])) == [
+        (SPACED_TEXT, "Positive"),
+        ("ok", "Neutral"),
+    ]
@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def test_each_lifespan_cycle_gets_fresh_clients(monkeypatch):
+    monkeypatch.setattr(main, "OPENAI_API_KEY", "test-key")
+
+    with TestClient(main.app):
+        first = main.http_client
+        assert main.openai_client is not None
+        assert not first.is_closed
+    assert first.is_closed
+    assert main.openai_client is None
+
+    # A second startup in the same process must not reuse the closed pool
+    with TestClient(main.app):
+        assert main.http_client is not first
+        assert not main.http_client.is_closed
+    assert main.http_client is None
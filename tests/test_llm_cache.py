@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.utils import llm_cache
+from app.utils.llm_cache import SemanticCache
+
+from .conftest import FakeRedis
+
+requires_numpy = pytest.mark.skipif(llm_cache.np is None, reason="numpy not installed")
+
+
+def test_exact_cache_round_trip(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(llm_cache, "redis_client", fake)
+
+    assert asyncio.run(llm_cache.get_exact("some text")) is None
+    asyncio.run(llm_cache.set_exact("some text", ("A summary", "Positive")))
+    assert asyncio.run(llm_cache.get_exact("some text")) == ("A summary", "Positive")
+    assert list(fake.ttls.values()) == [llm_cache.LLM_CACHE_TTL_SECONDS]
+
+
+def test_exact_cache_ignores_malformed_entries(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(llm_cache, "redis_client", fake)
+
+    fake.store[llm_cache._exact_key("broken")] = "not json"
+    assert asyncio.run(llm_cache.get_exact("broken")) is None
+    fake.store[llm_cache._exact_key("missing keys")] = '{"summary": "x"}'
+    assert asyncio.run(llm_cache.get_exact("missing keys")) is None
+
+
+def test_exact_cache_disabled_without_redis(monkeypatch):
+    monkeypatch.setattr(llm_cache, "redis_client", None)
+    asyncio.run(llm_cache.set_exact("text", ("summary", "Neutral")))
+    assert asyncio.run(llm_cache.get_exact("text")) is None
+
+
+@requires_numpy
+def test_semantic_cache_threshold():
+    cache = SemanticCache(max_entries=4, threshold=0.95)
+    assert cache.lookup([1.0, 0.0]) is None
+
+    cache.add([2.0, 0.0], ("A", "Positive"))
+    assert cache.lookup([1.0, 0.0]) == ("A", "Positive")
+    assert cache.lookup([0.99, 0.1]) == ("A", "Positive")  # cosine ~0.995
+    assert cache.lookup([0.7, 0.7]) is None  # cosine ~0.707
+    assert cache.lookup([0.0, 1.0]) is None
+
+
+@requires_numpy
+def test_semantic_cache_wraps_around():
+    cache = SemanticCache(max_entries=2, threshold=0.95)
+    cache.add([1.0, 0.0], ("A", "Positive"))
+    cache.add([0.0, 1.0], ("B", "Neutral"))
+    cache.add([-1.0, 0.0], ("C", "Negative"))  # overwrites the oldest entry
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0]) == ("B", "Neutral")
+    assert cache.lookup([-1.0, 0.0]) == ("C", "Negative")
+
+
+@requires_numpy
+def test_semantic_cache_resets_on_dimension_change():
+    cache = SemanticCache(max_entries=4, threshold=0.95)
+    cache.add([1.0, 0.0], ("A", "Positive"))
+    cache.add([0.0, 0.0, 1.0], ("B", "Neutral"))
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.lookup([0.0, 0.0, 1.0]) == ("B", "Neutral")
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import models as db_models
+from app.utils import auth
+from app.utils.auth import (
+    CachedToken,
+    create_access_token,
+    get_current_user,
+    validate_token,
+)
+
+from .conftest import TestingSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    auth._TOKEN_CACHE.clear()
+    yield
+    auth._TOKEN_CACHE.clear()
+
+
+def make_user(email: str) -> int:
+    with TestingSessionLocal() as db:
+        user = db_models.User(email=email, hashed_password="not-a-real-hash")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def count_decodes(monkeypatch) -> list:
+    calls = []
+    real_decode = auth.jwt.decode
+
+    def decode(*args, **kwargs):
+        calls.append(args)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", decode)
+    return calls
+
+
+def test_cache_hit_skips_jwt_decode(monkeypatch):
+    user_id = make_user("cachehit@example.com")
+    token = create_access_token(subject="cachehit@example.com", user_id=user_id)
+    calls = count_decodes(monkeypatch)
+
+    with TestingSessionLocal() as db:
+        assert get_current_user(token=token, db=db).id == user_id
+        assert get_current_user(token=token, db=db).id == user_id
+
+    assert len(calls) == 1
+    assert auth._TOKEN_CACHE[token].user_id == user_id
+
+
+def test_expired_cache_entry_is_revalidated(monkeypatch):
+    user_id = make_user("cacheexpired@example.com")
+    token = create_access_token(subject="cacheexpired@example.com", user_id=user_id)
+    # Stale entry pointing at the wrong user; must not be trusted
+    auth._TOKEN_CACHE[token] = CachedToken(user_id=user_id + 1000, exp=int(time.time()) - 10)
+    calls = count_decodes(monkeypatch)
+
+    with TestingSessionLocal() as db:
+        assert get_current_user(token=token, db=db).id == user_id
+
+    assert len(calls) == 1
+    cached = auth._TOKEN_CACHE[token]
+    assert cached.user_id == user_id
+    assert cached.exp > time.time()
+
+
+def test_deleted_user_is_rejected_and_evicted():
+    user_id = make_user("cachedeleted@example.com")
+    token = create_access_token(subject="cachedeleted@example.com", user_id=user_id)
+
+    with TestingSessionLocal() as db:
+        get_current_user(token=token, db=db)
+    assert token in auth._TOKEN_CACHE
+
+    with TestingSessionLocal() as db:
+        db.delete(db.get(db_models.User, user_id))
+        db.commit()
+
+    with TestingSessionLocal() as db:
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(token=token, db=db)
+    assert exc_info.value.status_code == 401
+    assert token not in auth._TOKEN_CACHE
+
+
+def test_validate_token_uses_uid_claim(monkeypatch):
+    user_id = make_user("uidclaim@example.com")
+    token = create_access_token(subject="uidclaim@example.com", user_id=user_id)
+
+    def no_lookup(*args, **kwargs):
+        raise AssertionError("uid tokens must not hit the users table")
+
+    monkeypatch.setattr(auth, "get_user_by_email", no_lookup)
+    with TestingSessionLocal() as db:
+        assert validate_token(token=token, db=db) == user_id
+
+
+def test_validate_token_legacy_token_falls_back_to_email():
+    user_id = make_user("legacytoken@example.com")
+    token = create_access_token("legacytoken@example.com")  # no uid claim
+
+    with TestingSessionLocal() as db:
+        assert validate_token(token=token, db=db) == user_id
+    assert auth._TOKEN_CACHE[token].user_id == user_id